@@ -4,16 +4,24 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-import joblib
 import numpy as np
+import atexit
 import io
 import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from prediction_log import PredictionLog
+from model_bundle import ModelManager, validate_version
+from symptom_session import SessionStore
 
 # Load Model Artifacts 
 MODEL_DIR = os.path.join(os.path.dirname(__file__), 'model')
 
 # On HF Spaces the model/ folder won't exist so download from HF Hub
-if not os.path.exists(os.path.join(MODEL_DIR, 'disease_model.pkl')):
+if not os.path.exists(os.path.join(MODEL_DIR, 'disease_model.pkl')) and \
+        not os.path.exists(os.path.join(MODEL_DIR, 'CURRENT')):
     print("Downloading model from Hugging Face Hub...")
     from huggingface_hub import snapshot_download
     snapshot_download(
@@ -23,23 +31,22 @@ if not os.path.exists(os.path.join(MODEL_DIR, 'disease_model.pkl')):
     )
     print("Download complete!")
 
-model           = joblib.load(os.path.join(MODEL_DIR, 'disease_model.pkl'))
-label_encoder   = joblib.load(os.path.join(MODEL_DIR, 'label_encoder.pkl'))
-symptom_cols    = joblib.load(os.path.join(MODEL_DIR, 'symptom_columns.pkl'))
-X_train         = joblib.load(os.path.join(MODEL_DIR, 'X_train.pkl'))
-severity_map    = joblib.load(os.path.join(MODEL_DIR, 'severity_map.pkl'))
-description_map = joblib.load(os.path.join(MODEL_DIR, 'description_map.pkl'))
-precaution_map  = joblib.load(os.path.join(MODEL_DIR, 'precaution_map.pkl'))
-disease_classes = list(label_encoder.classes_)
-
-# Rebuild LIME explainer from saved training data (can't pickle lambda functions)
-import lime.lime_tabular
-lime_explainer = lime.lime_tabular.LimeTabularExplainer(
-    training_data=X_train,
-    feature_names=symptom_cols,
-    class_names=disease_classes,
-    mode='classification',
-    random_state=42
+models = ModelManager(MODEL_DIR)
+
+# Optionally watch model/CURRENT and hot swap when it changes
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 0))
+if MODEL_WATCH_INTERVAL > 0:
+    models.watch(MODEL_WATCH_INTERVAL)
+
+# Prediction event log for regional trend queries
+PREDICTION_LOG_DIR = os.getenv("PREDICTION_LOG_DIR", os.path.join(os.path.dirname(__file__), 'events'))
+prediction_log = PredictionLog(PREDICTION_LOG_DIR)
+atexit.register(prediction_log.close)
+
+# Incremental symptom sessions for live differential diagnosis while typing
+sessions = SessionStore(
+    ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", 15 * 60)),
+    max_sessions=int(os.getenv("MAX_SESSIONS", 1000)),
 )
 
 
@@ -54,15 +61,32 @@ class PredictRequest(BaseModel):
     workerName: Optional[str] = "Healthcare Worker"
     location: Optional[str] = ""
 
+class SessionRequest(BaseModel):
+    symptoms: List[str] = []
+
+class SessionUpdate(BaseModel):
+    add: List[str] = []
+    remove: List[str] = []
+
+class ReloadRequest(BaseModel):
+    version: Optional[str] = None  # defaults to the version named in model/CURRENT
+
 # Core Prediction Logic
 def run_prediction(req: PredictRequest):
+    # Hold one bundle for the whole request so a hot swap can't mix versions
+    bundle = models.current()
+    symptom_cols    = bundle.symptom_cols
+    severity_map    = bundle.severity_map
+    disease_classes = bundle.disease_classes
+    model           = bundle.model
+
     input_vector = np.zeros(len(symptom_cols))
     matched, unmatched, severities = [], [], []
 
     for s in req.symptoms:
         s_clean = s.strip().lower().replace(' ', '_')
-        if s_clean in symptom_cols:
-            input_vector[symptom_cols.index(s_clean)] = 1
+        if s_clean in bundle.symptom_index:
+            input_vector[bundle.symptom_index[s_clean]] = 1
             matched.append(s_clean.replace('_', ' ').title())
             severities.append({'symptom': s_clean.replace('_', ' ').title(),
                                 'severity': severity_map.get(s_clean, 1)})
@@ -79,7 +103,7 @@ def run_prediction(req: PredictRequest):
         for i in top_idx
     ]
 
-    exp = lime_explainer.explain_instance(input_vector, model.predict_proba, num_features=10)
+    exp = bundle.lime_explainer.explain_instance(input_vector, model.predict_proba, num_features=10)
     lime_reasons = [
         {'feature': feat.replace('_', ' ').title(),
          'impact': round(w, 4),
@@ -89,6 +113,8 @@ def run_prediction(req: PredictRequest):
 
     avg_severity = round(np.mean([s['severity'] for s in severities]), 2) if severities else 0
 
+    prediction_log.append(top_disease, confidence, avg_severity, input_vector, req.location, time.time())
+
     return {
         'patientName': req.patientName,
         'patientAge': req.patientAge,
@@ -102,9 +128,10 @@ def run_prediction(req: PredictRequest):
         'matchedSymptoms': matched,
         'unmatchedSymptoms': unmatched,
         'symptomSeverities': severities,
-        'description': description_map.get(top_disease, 'Description not available.'),
-        'precautions': precaution_map.get(top_disease, []),
+        'description': bundle.description_map.get(top_disease, 'Description not available.'),
+        'precautions': bundle.precaution_map.get(top_disease, []),
         'limeExplanation': lime_reasons,
+        'modelVersion': bundle.version,
     }
 
 
@@ -116,7 +143,73 @@ def root():
 @app.get("/symptoms")
 def get_symptoms():
     """Returns list of all known symptoms."""
-    return {"symptoms": [s.replace('_', ' ') for s in symptom_cols]}
+    return {"symptoms": [s.replace('_', ' ') for s in models.current().symptom_cols]}
+
+def get_session_or_404(session_id: str):
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return session
+
+@app.post("/session")
+def create_session(req: SessionRequest):
+    """Starts an incremental prediction session, optionally with initial symptoms."""
+    session = sessions.create(models.current(), req.symptoms)
+    with session.lock:
+        return session.state()
+
+@app.get("/session/{session_id}")
+def get_session(session_id: str):
+    """Returns the current top predictions of a session."""
+    session = get_session_or_404(session_id)
+    with session.lock:
+        session.sync(models.current())
+        return session.state()
+
+@app.post("/session/{session_id}/symptoms")
+def update_session(session_id: str, req: SessionUpdate):
+    """Adds/removes symptoms and returns updated top predictions. Only affected trees are re-evaluated."""
+    session = get_session_or_404(session_id)
+    with session.lock:
+        session.sync(models.current())
+        for s in req.remove:
+            session.remove(s)
+        for s in req.add:
+            session.add(s)
+        return session.state()
+
+@app.get("/session/{session_id}/explain")
+def explain_session(session_id: str):
+    """Computes (or returns the cached) LIME explanation for the session's current symptoms."""
+    session = get_session_or_404(session_id)
+    with session.lock:
+        session.sync(models.current())
+        if not session.symptoms:
+            raise HTTPException(status_code=400, detail="At least one symptom is required")
+        return {"sessionId": session.id, "limeExplanation": session.explain(), "modelVersion": session.bundle.version}
+
+@app.delete("/session/{session_id}")
+def delete_session(session_id: str):
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"deleted": session_id}
+
+@app.get("/model")
+def get_model():
+    """Returns the active model version and the state of any reload in progress."""
+    return models.status()
+
+@app.post("/model/reload", status_code=202)
+def reload_model(req: ReloadRequest):
+    """Loads and warms a model version in the background, then swaps it in."""
+    if req.version is not None:
+        try:
+            validate_version(MODEL_DIR, req.version)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if not models.reload(req.version):
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+    return {"status": "loading", "version": req.version or "CURRENT", "active": models.current().version}
 
 @app.post("/predict")
 def predict(req: PredictRequest):
@@ -125,6 +218,13 @@ def predict(req: PredictRequest):
         raise HTTPException(status_code=400, detail="At least one symptom is required")
     return run_prediction(req)
 
+@app.get("/trends")
+def get_trends(location: Optional[str] = None, days: int = 7, disease: Optional[str] = None):
+    """Daily prediction counts per disease for a location (or all locations), from incremental rollups."""
+    if not 1 <= days <= 365:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 365")
+    return prediction_log.trends(location=location, days=days, disease=disease)
+
 @app.post("/predict/pdf")
 def predict_pdf(req: PredictRequest):
     """Returns prediction as a downloadable PDF report."""
@@ -138,5 +238,8 @@ def predict_pdf(req: PredictRequest):
     return StreamingResponse(
         io.BytesIO(pdf_bytes),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+            "X-Model-Version": data["modelVersion"],
+        }
     )
@@ -0,0 +1,144 @@
+"""
+Compact LIME initialization.
+
+LimeTabularExplainer only needs per-feature summary statistics of the training
+data (quartile bins, per-bin means/stds/mins/maxs, and value frequencies of the
+discretized columns). This module computes them once into a small artifact,
+lime_stats.pkl, so the service can build the explainer without keeping X_train
+in memory.
+
+Build the artifact (and check explanations are unchanged) with:
+    python lime_stats.py [model_dir]
+"""
+import collections
+import os
+import pickle
+import sys
+import tracemalloc
+import joblib
+import numpy as np
+import lime.lime_tabular
+from lime.discretize import QuartileDiscretizer
+
+LIME_STATS_FILE = 'lime_stats.pkl'
+
+
+def compute_lime_stats(X_train, feature_names) -> dict:
+    """Training summary stats in the format of LimeTabularExplainer(training_data_stats=...)."""
+    X_train = np.asarray(X_train)
+    discretizer = QuartileDiscretizer(X_train, [], feature_names)
+    bins = {
+        feature: np.unique(qts)
+        for feature, qts in zip(discretizer.to_discretize, discretizer.bins(X_train, None))
+    }
+    discretized = discretizer.discretize(X_train)
+
+    feature_values, feature_frequencies = {}, {}
+    for feature in range(X_train.shape[1]):
+        counts = sorted(collections.Counter(discretized[:, feature]).items())
+        feature_values[feature] = [float(v) for v, _ in counts]
+        feature_frequencies[feature] = [int(c) for _, c in counts]
+
+    return {
+        'means':               discretizer.means,
+        'stds':                discretizer.stds,
+        'mins':                discretizer.mins,
+        'maxs':                discretizer.maxs,
+        'bins':                bins,
+        'feature_values':      feature_values,
+        'feature_frequencies': feature_frequencies,
+    }
+
+
+def build_lime_explainer(stats, feature_names, class_names):
+    """Builds the explainer from precomputed stats alone. Equivalent to building it from X_train."""
+    # Only the column count of training_data is used when stats are supplied
+    placeholder = np.zeros((1, len(feature_names)))
+    return lime.lime_tabular.LimeTabularExplainer(
+        training_data=placeholder,
+        feature_names=feature_names,
+        class_names=class_names,
+        mode='classification',
+        random_state=42,
+        training_data_stats=stats,
+    )
+
+
+def load_lime_stats(model_dir: str, feature_names):
+    """
+    Loads lime_stats.pkl from model_dir. For bundles built before the artifact
+    existed, derives the stats from X_train.pkl and releases X_train right away.
+    """
+    stats_path = os.path.join(model_dir, LIME_STATS_FILE)
+    if os.path.exists(stats_path):
+        return joblib.load(stats_path)
+
+    X_train = joblib.load(os.path.join(model_dir, 'X_train.pkl'))
+    stats = compute_lime_stats(X_train, feature_names)
+    del X_train
+    return stats
+
+
+def _measure(fn):
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def main():
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model')
+
+    model         = joblib.load(os.path.join(model_dir, 'disease_model.pkl'))
+    label_encoder = joblib.load(os.path.join(model_dir, 'label_encoder.pkl'))
+    symptom_cols  = joblib.load(os.path.join(model_dir, 'symptom_columns.pkl'))
+    class_names   = list(label_encoder.classes_)
+
+    # Before: X_train resident + explainer built from it
+    def full_init():
+        X_train = joblib.load(os.path.join(model_dir, 'X_train.pkl'))
+        explainer = lime.lime_tabular.LimeTabularExplainer(
+            training_data=X_train,
+            feature_names=symptom_cols,
+            class_names=class_names,
+            mode='classification',
+            random_state=42
+        )
+        return X_train, explainer
+
+    (X_train, full_explainer), full_current, full_peak = _measure(full_init)
+
+    stats = compute_lime_stats(X_train, symptom_cols)
+    serialized = pickle.dumps(stats)
+
+    # After: stats only, deserialized as the service would load them
+    def compact_init():
+        loaded = pickle.loads(serialized)
+        return build_lime_explainer(loaded, symptom_cols, class_names)
+
+    compact_explainer, compact_current, compact_peak = _measure(compact_init)
+
+    print(f"X_train: {X_train.shape}, {X_train.nbytes / 1024:.1f} KiB in memory")
+    print(f"lime_stats.pkl: {len(serialized) / 1024:.1f} KiB")
+    print(f"Resident after init (X_train + explainer): {full_current / 1024:.1f} KiB (peak {full_peak / 1024:.1f} KiB)")
+    print(f"Resident after init (stats + explainer):   {compact_current / 1024:.1f} KiB (peak {compact_peak / 1024:.1f} KiB)")
+
+    # Both explainers start from random_state=42, so equal stats must give equal explanations
+    rows = X_train[:5]
+    for i, row in enumerate(rows):
+        expected = full_explainer.explain_instance(row, model.predict_proba, num_features=10).as_list()
+        actual   = compact_explainer.explain_instance(row, model.predict_proba, num_features=10).as_list()
+        if expected != actual:
+            raise SystemExit(f"Explanation mismatch on row {i}:\n  X_train: {expected}\n  stats:   {actual}")
+    print(f"Explanations identical on {len(rows)} sample rows")
+
+    # Only a verified artifact reaches model_dir, where load_lime_stats picks it up
+    stats_path = os.path.join(model_dir, LIME_STATS_FILE)
+    joblib.dump(stats, stats_path + '.tmp')
+    os.replace(stats_path + '.tmp', stats_path)
+    print(f"Saved: {stats_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import os
+import re
+import threading
+import time
+from functools import cached_property
+import joblib
+import numpy as np
+from lime_stats import load_lime_stats, build_lime_explainer
+from symptom_session import ForestIndex
+
+# Model directory layout:
+#   model/*.pkl                   legacy flat bundle (version from model/VERSION, else "base")
+#   model/versions/<version>/*.pkl versioned bundles
+#   model/CURRENT                 name of the active version under versions/
+
+VERSION_PATTERN = re.compile(r'[A-Za-z0-9._-]+')
+
+
+class ModelBundle:
+    """All artifacts of one model version. Never mutated once loaded."""
+
+    def __init__(self, model_dir: str, version: str):
+        self.model_dir = model_dir
+        self.version   = version
+
+        self.model           = joblib.load(os.path.join(model_dir, 'disease_model.pkl'))
+        self.label_encoder   = joblib.load(os.path.join(model_dir, 'label_encoder.pkl'))
+        self.symptom_cols    = joblib.load(os.path.join(model_dir, 'symptom_columns.pkl'))
+        self.severity_map    = joblib.load(os.path.join(model_dir, 'severity_map.pkl'))
+        self.description_map = joblib.load(os.path.join(model_dir, 'description_map.pkl'))
+        self.precaution_map  = joblib.load(os.path.join(model_dir, 'precaution_map.pkl'))
+        self.disease_classes = list(self.label_encoder.classes_)
+        self.symptom_index   = {s: i for i, s in enumerate(self.symptom_cols)}
+
+        # Rebuild LIME explainer from precomputed training stats (can't pickle lambda functions).
+        # X_train is only read if the bundle has no lime_stats.pkl, and is not kept.
+        self.lime_explainer = build_lime_explainer(
+            load_lime_stats(model_dir, self.symptom_cols),
+            self.symptom_cols,
+            self.disease_classes,
+        )
+
+        self.loaded_at = time.time()
+
+    @cached_property
+    def forest_index(self):
+        """Tree structure for incremental sessions; None if the model is not a tree forest."""
+        return ForestIndex(self.model) if ForestIndex.supports(self.model) else None
+
+    def warm_up(self, n_samples: int = 8):
+        """Runs representative predictions so the first real request doesn't pay for cold caches."""
+        rng = np.random.default_rng(0)
+        rows = np.zeros((n_samples, len(self.symptom_cols)))
+        for row in rows:
+            row[rng.choice(len(self.symptom_cols), size=min(4, len(self.symptom_cols)), replace=False)] = 1
+        self.model.predict_proba(rows)
+        # Build the session index now rather than on the first /session call after a swap
+        self.forest_index
+        for row in rows[:2]:
+            self.lime_explainer.explain_instance(row, self.model.predict_proba, num_features=10)
+
+
+def resolve_bundle_dir(root: str, version=None):
+    """Returns (model_dir, version) for the requested or currently active version."""
+    if version is None:
+        current_file = os.path.join(root, 'CURRENT')
+        if os.path.exists(current_file):
+            with open(current_file) as f:
+                version = f.read().strip() or None
+
+    if version is None:
+        version_file = os.path.join(root, 'VERSION')
+        legacy_version = 'base'
+        if os.path.exists(version_file):
+            with open(version_file) as f:
+                legacy_version = f.read().strip() or legacy_version
+        return root, legacy_version
+
+    validate_version(root, version)
+    model_dir = os.path.join(root, 'versions', version)
+    if not os.path.exists(os.path.join(model_dir, 'disease_model.pkl')):
+        raise FileNotFoundError(f"No model bundle found for version '{version}' in {model_dir}")
+    return model_dir, version
+
+
+def validate_version(root: str, version: str):
+    """Only names of existing directories under versions/ are accepted, so paths can't escape it."""
+    versions_dir = os.path.join(root, 'versions')
+    if not VERSION_PATTERN.fullmatch(version) or version in ('.', '..'):
+        raise ValueError(f"Invalid model version '{version}'")
+    if not os.path.isdir(versions_dir) or version not in os.listdir(versions_dir):
+        raise ValueError(f"Unknown model version '{version}'")
+
+
+class ModelManager:
+    """
+    Holds the active ModelBundle and swaps in new versions without downtime.
+    A new bundle is loaded and warmed in a background thread, then replaces the
+    active one with a single reference assignment. Requests grab the bundle once
+    via current() and finish on that version even if a swap happens meanwhile.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        model_dir, version = resolve_bundle_dir(root)
+        self._bundle = ModelBundle(model_dir, version)
+        self._bundle.warm_up()
+        self._reload_lock = threading.Lock()
+        self._reloading = None
+        self._failed_version = None
+        self.last_error = None
+
+    def current(self) -> ModelBundle:
+        return self._bundle
+
+    def reload(self, version=None) -> bool:
+        """Starts loading a version in the background. Returns False if a reload is already running."""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        self._reloading = version or 'CURRENT'
+        threading.Thread(target=self._load_and_swap, args=(version,), daemon=True).start()
+        return True
+
+    def _load_and_swap(self, version):
+        try:
+            model_dir, resolved = resolve_bundle_dir(self.root, version)
+            bundle = ModelBundle(model_dir, resolved)
+            bundle.warm_up()
+            self._bundle = bundle
+            self._failed_version = None
+            self.last_error = None
+            print(f"Model version {resolved} is now active")
+        except Exception as e:
+            self._failed_version = version
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"Model reload failed, keeping version {self._bundle.version}: {self.last_error}")
+        finally:
+            self._reloading = None
+            self._reload_lock.release()
+
+    def watch(self, interval: float):
+        """Polls model/CURRENT and reloads whenever it names a different version."""
+        current_file = os.path.join(self.root, 'CURRENT')
+
+        def poll():
+            while True:
+                time.sleep(interval)
+                if not os.path.exists(current_file):
+                    continue
+                with open(current_file) as f:
+                    version = f.read().strip()
+                if version in ('', self._bundle.version, self._failed_version) or self._reloading:
+                    continue
+                self.reload(version)
+
+        threading.Thread(target=poll, name="model-watcher", daemon=True).start()
+
+    def status(self):
+        bundle = self._bundle
+        return {
+            "version":   bundle.version,
+            "loadedAt":  bundle.loaded_at,
+            "reloading": self._reloading,
+            "lastError": self.last_error,
+        }
@@ -0,0 +1,214 @@
+import glob
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+# Append-only, columnar log of every prediction the service makes.
+# Events are queued by the request thread and written by a background thread
+# into numbered .npz segments (one array per column). Rollups by
+# location x disease x day are updated on every append, so trend queries
+# never scan raw events. After every flush the rollups are snapshotted with
+# the last segment they cover, so startup only replays newer segments.
+
+# Location key of the all-locations rollup. Client locations always map to a
+# string, so None can never collide with one.
+ALL_LOCATIONS = None
+
+COLUMNS = ("disease", "confidence", "severity", "symptoms", "location", "timestamp")
+
+SNAPSHOT_FILE = "rollups.json"
+
+
+def _location_key(location) -> str:
+    return (location or "").strip().lower() or "unknown"
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class _Rollup:
+    __slots__ = ("count", "confidence_sum", "severity_sum")
+
+    def __init__(self):
+        self.count = 0
+        self.confidence_sum = 0.0
+        self.severity_sum = 0.0
+
+    def add(self, confidence: float, severity: float):
+        self.count += 1
+        self.confidence_sum += confidence
+        self.severity_sum += severity
+
+
+class PredictionLog:
+    def __init__(self, log_dir: str, flush_every: int = 256, flush_interval: float = 5.0, max_queue: int = 10000):
+        self.log_dir = log_dir
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        os.makedirs(log_dir, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._buffer = {c: [] for c in COLUMNS}
+        self._rollups_lock = threading.Lock()
+        # (location, day) -> {disease: _Rollup}
+        self._rollups = {}
+        self.dropped = 0
+
+        segments = {}
+        for path in glob.glob(os.path.join(log_dir, "segment_*.npz")):
+            segments[int(os.path.basename(path)[len("segment_"):-len(".npz")])] = path
+
+        last_covered = self._load_snapshot()
+        for index in sorted(i for i in segments if i > last_covered):
+            self._load_segment(segments[index])
+        self._next_segment = max(segments) + 1 if segments else 0
+
+        self._writer = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._writer.start()
+
+    # Write path
+
+    def append(self, disease: str, confidence: float, severity: float, symptom_vector, location: str, timestamp: float):
+        """Queues one prediction event. Never blocks the caller; drops the event if the queue is full."""
+        event = (
+            disease,
+            float(confidence),
+            float(severity),
+            np.packbits(np.asarray(symptom_vector, dtype=np.uint8)),
+            location or "",
+            float(timestamp),
+        )
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Flushes pending events and stops the writer thread."""
+        self._queue.put(None)
+        self._writer.join()
+
+    def _run(self):
+        while True:
+            try:
+                event = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush()
+                continue
+
+            if event is None:
+                self._flush()
+                return
+
+            # Segments hold one bitset width; flush if the symptom list changed
+            bitsets = self._buffer["symptoms"]
+            if bitsets and len(bitsets[0]) != len(event[3]):
+                self._flush()
+
+            for column, value in zip(COLUMNS, event):
+                self._buffer[column].append(value)
+            self._apply(event[0], event[1], event[2], event[4], event[5])
+
+            if len(self._buffer["timestamp"]) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer["timestamp"]:
+            return
+
+        path = os.path.join(self.log_dir, f"segment_{self._next_segment:06d}.npz")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                disease=np.array(self._buffer["disease"], dtype=str),
+                confidence=np.array(self._buffer["confidence"], dtype=np.float32),
+                severity=np.array(self._buffer["severity"], dtype=np.float32),
+                symptoms=np.stack(self._buffer["symptoms"]),
+                location=np.array(self._buffer["location"], dtype=str),
+                timestamp=np.array(self._buffer["timestamp"], dtype=np.float64),
+            )
+        os.replace(tmp_path, path)
+
+        self._buffer = {c: [] for c in COLUMNS}
+        # Every applied event is now in a segment, so the rollups cover exactly segments <= this one
+        self._save_snapshot(self._next_segment)
+        self._next_segment += 1
+
+    def _load_segment(self, path: str):
+        with np.load(path) as seg:
+            for disease, confidence, severity, location, timestamp in zip(
+                seg["disease"], seg["confidence"], seg["severity"], seg["location"], seg["timestamp"]
+            ):
+                self._apply(str(disease), float(confidence), float(severity), str(location), float(timestamp))
+
+    def _load_snapshot(self) -> int:
+        """Loads the rollup snapshot and returns the last segment index it covers (-1 if none)."""
+        path = os.path.join(self.log_dir, SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return -1
+
+        with open(path) as f:
+            snapshot = json.load(f)
+        for loc, day, disease, count, confidence_sum, severity_sum in snapshot["rollups"]:
+            r = _Rollup()
+            r.count, r.confidence_sum, r.severity_sum = count, confidence_sum, severity_sum
+            self._rollups.setdefault((loc, day), {})[disease] = r
+        return snapshot["last_segment"]
+
+    def _save_snapshot(self, last_segment: int):
+        with self._rollups_lock:
+            rows = [
+                [loc, day, disease, r.count, r.confidence_sum, r.severity_sum]
+                for (loc, day), by_disease in self._rollups.items()
+                for disease, r in by_disease.items()
+            ]
+
+        path = os.path.join(self.log_dir, SNAPSHOT_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"last_segment": last_segment, "rollups": rows}, f)
+        os.replace(path + ".tmp", path)
+
+    # Rollups
+
+    def _apply(self, disease: str, confidence: float, severity: float, location: str, timestamp: float):
+        day = _day(timestamp)
+        with self._rollups_lock:
+            for loc in (_location_key(location), ALL_LOCATIONS):
+                by_disease = self._rollups.setdefault((loc, day), {})
+                if disease not in by_disease:
+                    by_disease[disease] = _Rollup()
+                by_disease[disease].add(confidence, severity)
+
+    def trends(self, location=None, days: int = 7, disease=None, end_day=None):
+        """
+        Daily case counts, average confidence and average severity per disease
+        for one location (or all locations) over the last `days` days.
+        Cost depends only on the window size, not on the number of logged events.
+        """
+        loc = _location_key(location) if location else ALL_LOCATIONS
+        end = end_day or datetime.now(timezone.utc).date()
+
+        series = []
+        with self._rollups_lock:
+            for offset in range(days - 1, -1, -1):
+                day = (end - timedelta(days=offset)).strftime("%Y-%m-%d")
+                by_disease = self._rollups.get((loc, day), {})
+                rows = [
+                    {
+                        "disease":       name,
+                        "count":         r.count,
+                        "avgConfidence": round(r.confidence_sum / r.count, 2),
+                        "avgSeverity":   round(r.severity_sum / r.count, 2),
+                    }
+                    for name, r in by_disease.items()
+                    if disease is None or name == disease
+                ]
+                rows.sort(key=lambda row: row["count"], reverse=True)
+                series.append({"day": day, "total": sum(row["count"] for row in rows), "diseases": rows})
+
+        return {"location": location or "all", "days": series}
@@ -0,0 +1,267 @@
+"""
+Incremental symptom sessions.
+
+A worker enters symptoms one at a time. Instead of re-running the whole forest
+for every change, a session caches each tree's current root-to-leaf path. When
+a symptom flips, only trees whose current path tests that symptom can land in a
+different leaf, and each of those is re-walked from the first node that tests
+it. Probabilities are the mean of the cached leaf distributions. LIME
+explanations are computed only on request and cached until the symptoms change.
+
+Check that session probabilities match model.predict_proba with:
+    python symptom_session.py [model_dir] [n_edits]
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import numpy as np
+
+
+def normalize_symptom(s: str) -> str:
+    return s.strip().lower().replace(' ', '_')
+
+
+class ForestIndex:
+    """Per-model tree structure in plain lists, plus every leaf's class distribution."""
+
+    def __init__(self, model):
+        self.n_trees = len(model.estimators_)
+        self.children_left, self.children_right = [], []
+        self.feature, self.threshold = [], []
+        offsets, leaf_proba = [], []
+
+        offset = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            self.children_left.append(tree.children_left.tolist())
+            self.children_right.append(tree.children_right.tolist())
+            self.feature.append(tree.feature.tolist())
+            self.threshold.append(tree.threshold.tolist())
+
+            value = tree.value[:, 0, :]
+            totals = value.sum(axis=1, keepdims=True)
+            leaf_proba.append(np.divide(value, totals, out=np.zeros_like(value), where=totals > 0))
+            offsets.append(offset)
+            offset += tree.node_count
+
+        # All trees' node distributions stacked; row offsets[t] + node is node of tree t
+        self.node_proba = np.vstack(leaf_proba)
+        self.offsets = np.array(offsets)
+
+    @staticmethod
+    def supports(model) -> bool:
+        return hasattr(model, 'estimators_') and all(hasattr(e, 'tree_') for e in model.estimators_)
+
+    def descend(self, t: int, node: int, x, path: list) -> int:
+        """Walks tree t from node to a leaf, appending visited internal nodes to path."""
+        left, right = self.children_left[t], self.children_right[t]
+        feature, threshold = self.feature[t], self.threshold[t]
+        while left[node] != -1:
+            path.append(node)
+            node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+        return node
+
+
+class SymptomSession:
+    def __init__(self, session_id: str, bundle, symptoms=()):
+        self.id = session_id
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+        self.symptoms = []            # normalized names, in entry order
+        self.unmatched = []
+        self._load(bundle)
+        for s in symptoms:
+            self.add(s)
+
+    def _load(self, bundle):
+        """(Re)builds the cached tree state for a model bundle from the current symptoms."""
+        self.bundle = bundle
+        self.vector = [0.0] * len(bundle.symptom_cols)
+        # Symptoms the new bundle doesn't know become unmatched
+        for s in [s for s in self.symptoms if s not in bundle.symptom_index]:
+            self.symptoms.remove(s)
+            self.unmatched.append(s.replace('_', ' '))
+        for s in self.symptoms:
+            self.vector[bundle.symptom_index[s]] = 1.0
+        self._explanation = None
+
+        self.index = bundle.forest_index
+        if self.index is None:
+            return
+
+        n_features = len(self.vector)
+        self.paths = []
+        self.leaves = np.zeros(self.index.n_trees, dtype=np.int64)
+        # path_tests[t, f] is True if tree t's current path tests feature f
+        self.path_tests = np.zeros((self.index.n_trees, n_features), dtype=bool)
+        for t in range(self.index.n_trees):
+            path = []
+            self.leaves[t] = self.index.descend(t, 0, self.vector, path)
+            self.paths.append(path)
+            self._mark_path(t)
+
+    def _mark_path(self, t: int):
+        feature = self.index.feature[t]
+        row = self.path_tests[t]
+        row[:] = False
+        row[[feature[node] for node in self.paths[t]]] = True
+
+    def _flip(self, f: int, value: float):
+        if self.vector[f] == value:
+            return
+        self.vector[f] = value
+        self._explanation = None
+        if self.index is None:
+            return
+
+        for t in np.flatnonzero(self.path_tests[:, f]):
+            feature = self.index.feature[t]
+            path = self.paths[t]
+            # The path up to the first test of f is unaffected by the change
+            i = next(i for i, node in enumerate(path) if feature[node] == f)
+            start = path[i]
+            del path[i:]
+            self.leaves[t] = self.index.descend(t, start, self.vector, path)
+            self._mark_path(t)
+
+    def add(self, symptom: str):
+        s = normalize_symptom(symptom)
+        if s in self.symptoms:
+            return
+        if s not in self.bundle.symptom_index:
+            if symptom not in self.unmatched:
+                self.unmatched.append(symptom)
+            return
+        self.symptoms.append(s)
+        self._flip(self.bundle.symptom_index[s], 1.0)
+
+    def remove(self, symptom: str):
+        s = normalize_symptom(symptom)
+        if s not in self.symptoms or s not in self.bundle.symptom_index:
+            self.unmatched = [u for u in self.unmatched if normalize_symptom(u) != s]
+            return
+        self.symptoms.remove(s)
+        self._flip(self.bundle.symptom_index[s], 0.0)
+
+    def sync(self, bundle):
+        """Moves the session to a new model bundle after a hot swap."""
+        if bundle is not self.bundle:
+            self._load(bundle)
+
+    def proba(self):
+        if self.index is None:
+            return self.bundle.model.predict_proba([self.vector])[0]
+        return self.index.node_proba[self.index.offsets + self.leaves].mean(axis=0)
+
+    def state(self, top_k: int = 3):
+        bundle = self.bundle
+        proba = self.proba()
+        top_idx = np.argsort(proba)[::-1][:top_k]
+        severities = [bundle.severity_map.get(s, 1) for s in self.symptoms]
+        return {
+            'sessionId':         self.id,
+            'primaryDiagnosis':  bundle.disease_classes[top_idx[0]] if self.symptoms else None,
+            'confidenceScore':   round(float(proba[top_idx[0]]) * 100, 2) if self.symptoms else 0,
+            'severityScore':     round(float(np.mean(severities)), 2) if severities else 0,
+            'topPredictions':    [
+                {'disease': bundle.disease_classes[i], 'confidence': round(float(proba[i]) * 100, 2)}
+                for i in top_idx
+            ] if self.symptoms else [],
+            'matchedSymptoms':   [s.replace('_', ' ').title() for s in self.symptoms],
+            'unmatchedSymptoms': list(self.unmatched),
+            'modelVersion':      bundle.version,
+        }
+
+    def explain(self, num_features: int = 10):
+        if self._explanation is None:
+            exp = self.bundle.lime_explainer.explain_instance(
+                np.array(self.vector), self.bundle.model.predict_proba, num_features=num_features
+            )
+            self._explanation = [
+                {'feature': feat.replace('_', ' ').title(),
+                 'impact': round(w, 4),
+                 'direction': 'Supports Diagnosis' if w > 0 else 'Against Diagnosis'}
+                for feat, w in exp.as_list()
+            ]
+        return self._explanation
+
+
+def check_against_model(bundle, n_edits: int = 200, seed: int = 0) -> float:
+    """Applies random add/remove edits and returns the max difference from model.predict_proba."""
+    rng = random.Random(seed)
+    session = SymptomSession('check', bundle)
+    present = set()
+    worst = 0.0
+    for _ in range(n_edits):
+        symptom = rng.choice(bundle.symptom_cols)
+        if symptom in present:
+            session.remove(symptom)
+            present.discard(symptom)
+        else:
+            session.add(symptom)
+            present.add(symptom)
+
+        vector = np.zeros(len(bundle.symptom_cols))
+        vector[[bundle.symptom_index[s] for s in present]] = 1
+        expected = bundle.model.predict_proba([vector])[0]
+        worst = max(worst, float(np.abs(session.proba() - expected).max()))
+    return worst
+
+
+class SessionStore:
+    """Live sessions, evicted after ttl_seconds without access or when max_sessions is exceeded."""
+
+    def __init__(self, ttl_seconds: float, max_sessions: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access < self.ttl_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def create(self, bundle, symptoms=()) -> SymptomSession:
+        session = SymptomSession(uuid.uuid4().hex, bundle, symptoms)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._expire()
+        return session
+
+    def get(self, session_id: str):
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+
+def main():
+    from model_bundle import ModelBundle
+
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model')
+    n_edits = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    bundle = ModelBundle(model_dir, 'check')
+    worst = check_against_model(bundle, n_edits)
+    if worst > 1e-9:
+        raise SystemExit(f"Session probabilities differ from predict_proba by up to {worst}")
+    print(f"Session probabilities match predict_proba over {n_edits} edits (max diff {worst})")
+
+
+if __name__ == '__main__':
+    main()
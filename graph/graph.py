@@ -5,6 +5,9 @@ from nodes.xai_node import xai_node
 from nodes.llm_node import llm_node
 from nodes.report_node import report_node
 from llm import LLMConclusion       
+from utils.checkpointer import checkpointer
+from utils.admission import admission
+from utils.tracing import tracer
 class PredictRequest(BaseModel):
     symptoms: List[str]
     patientName: Optional[str] = "Patient"
@@ -25,9 +28,10 @@ class HealthcareState(TypedDict):
 
 builder = StateGraph(HealthcareState)
 
-builder.add_node("xai_node", xai_node)
-builder.add_node("llm_node", llm_node)
-builder.add_node("report_node", report_node)
+# Each node is traced (utils/tracing.py) and runs under its stage's concurrency limit (utils/admission.py)
+builder.add_node("xai_node", tracer.traced("xai_node", admission.gated("ml", xai_node)))
+builder.add_node("llm_node", tracer.traced("llm_node", admission.gated("llm", llm_node)))
+builder.add_node("report_node", tracer.traced("report_node", admission.gated("pdf", report_node)))
 
 builder.set_entry_point("xai_node")
 
@@ -35,5 +39,6 @@ builder.add_edge("xai_node", "llm_node")
 builder.add_edge("llm_node", "report_node")
 builder.add_edge("report_node", END)
 
-graph = builder.compile()
+# Checkpoint after every node so a failed run resumes without repeating ML/LLM work
+graph = builder.compile(checkpointer=checkpointer)
 
@@ -4,6 +4,7 @@ import re
 from openai import OpenAI
 from dotenv import load_dotenv
 from pydantic import BaseModel
+from utils.tracing import record_llm_usage, record_outcome
 
 load_dotenv()
 
@@ -77,6 +78,7 @@ def call_llm(prompt: str) -> LLMConclusion:
         temperature=0.1,
     )
 
+    record_llm_usage(response.usage)
     response_content = response.choices[0].message.content.strip()
 
     # robustly extract JSON if the LLM added text around it
@@ -91,4 +93,5 @@ def call_llm(prompt: str) -> LLMConclusion:
         llm_conclusion = LLMConclusion.parse_raw(json_str)
         return llm_conclusion
     except Exception as e:
+        record_outcome("parse_error")
         raise ValueError(f"LLM Response Error: {e}. Raw content: {response_content}")
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""
+Load-test driver for the graph server (server.py).
+
+Ramps concurrency against /analyze and /analyze/json and reports throughput,
+p50/p95/p99 latency per endpoint and the saturation point.
+
+With --spawn it starts the LLM and ML stubs (loadtest/stubs.py) and the graph
+server locally, so the whole test runs offline on one machine:
+
+    cd graph
+    python loadtest/driver.py --spawn --levels 1,2,4,8,16,32 --duration 20 \\
+        --llm-latency-ms 1200 --ml-latency-ms 300 --llm-error-rate 0.02
+
+Against an already running server:
+    python loadtest/driver.py --url http://127.0.0.1:8001 --levels 1,4,16
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import httpx
+
+ENDPOINTS = ["/analyze", "/analyze/json"]
+
+SYMPTOM_SETS = [
+    ["itching", "skin_rash", "nodal_skin_eruptions"],
+    ["high_fever", "chills", "sweating", "headache"],
+    ["cough", "breathlessness", "chest_pain"],
+    ["vomiting", "diarrhoea", "dehydration"],
+    ["yellowish_skin", "dark_urine", "abdominal_pain", "fatigue"],
+    ["joint_pain", "muscle_pain", "high_fever", "red_spots_over_body"],
+]
+LOCATIONS = ["Pune PHC", "Nashik PHC", "Nagpur PHC"]
+
+GRAPH_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def run_level(base_url: str, endpoints, concurrency: int, duration: float, timeout: float):
+    """Runs `concurrency` closed-loop workers for `duration` seconds. Returns per-endpoint samples."""
+    samples = {ep: [] for ep in endpoints}   # (status, latency_seconds)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(worker_id: int):
+        rng = random.Random(worker_id)
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            i = worker_id
+            while time.monotonic() < deadline:
+                endpoint = endpoints[i % len(endpoints)]
+                i += 1
+                payload = {
+                    "symptoms":    rng.choice(SYMPTOM_SETS),
+                    "patientName": f"Load Test {worker_id}",
+                    "patientAge":  rng.randint(1, 90),
+                    "location":    rng.choice(LOCATIONS),
+                }
+                start = time.monotonic()
+                try:
+                    status = client.post(endpoint, json=payload).status_code
+                except httpx.HTTPError:
+                    status = 0
+                elapsed = time.monotonic() - start
+                with lock:
+                    samples[endpoint].append((status, elapsed))
+
+    threads = [threading.Thread(target=worker, args=(w,), daemon=True) for w in range(concurrency)]
+    started = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.monotonic() - started
+
+
+def summarize(samples, wall_seconds: float):
+    summary = {}
+    for endpoint, rows in samples.items():
+        ok = sorted(lat for status, lat in rows if status == 200)
+        summary[endpoint] = {
+            "requests":   len(rows),
+            "ok":         len(ok),
+            "rejected":   sum(1 for status, _ in rows if status == 429),
+            "errors":     sum(1 for status, _ in rows if status not in (200, 429)),
+            "throughput": round(len(ok) / wall_seconds, 2),
+            "p50Ms":      round(percentile(ok, 50) * 1000, 1),
+            "p95Ms":      round(percentile(ok, 95) * 1000, 1),
+            "p99Ms":      round(percentile(ok, 99) * 1000, 1),
+        }
+    return summary
+
+
+def find_saturation(levels, results, min_gain: float, max_error_rate: float):
+    """
+    The saturation point is the last concurrency level before throughput stops
+    growing by at least `min_gain`, or before errors/rejections exceed `max_error_rate`.
+    Returns {"status": "reached" | "lowest" | "not_reached", "level": int or None};
+    "lowest" means even the first level was over the error limit.
+    """
+    previous_level, previous_tput = None, 0.0
+    for level, summary in zip(levels, results):
+        tput = sum(s["throughput"] for s in summary.values())
+        total = sum(s["requests"] for s in summary.values()) or 1
+        failed = sum(s["errors"] + s["rejected"] for s in summary.values())
+        if failed / total > max_error_rate:
+            if previous_level is None:
+                return {"status": "lowest", "level": level}
+            return {"status": "reached", "level": previous_level}
+        if previous_level is not None and tput < previous_tput * (1 + min_gain):
+            return {"status": "reached", "level": previous_level}
+        previous_level, previous_tput = level, tput
+    return {"status": "not_reached", "level": None}
+
+
+def print_report(levels, results, saturation):
+    header = f"{'conc':>5} {'endpoint':<14} {'req':>6} {'ok':>6} {'429':>5} {'err':>5} {'req/s':>8} {'p50ms':>9} {'p95ms':>9} {'p99ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for level, summary in zip(levels, results):
+        for endpoint, s in summary.items():
+            print(f"{level:>5} {endpoint:<14} {s['requests']:>6} {s['ok']:>6} {s['rejected']:>5} {s['errors']:>5} "
+                  f"{s['throughput']:>8} {s['p50Ms']:>9} {s['p95Ms']:>9} {s['p99Ms']:>9}")
+    print()
+    if saturation["status"] == "not_reached":
+        print("Saturation point: not reached (throughput still growing at the highest level)")
+    elif saturation["status"] == "lowest":
+        print(f"Saturation point: at or below the lowest level tested ({saturation['level']}); "
+              f"errors/rejections already exceed the limit")
+    else:
+        print(f"Saturation point: ~{saturation['level']} concurrent requests")
+
+
+def wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn_stack(args):
+    """Starts the ML stub, LLM stub and graph server. Returns (base_url, processes)."""
+    stubs = os.path.join(GRAPH_DIR, "loadtest", "stubs.py")
+    procs = [
+        subprocess.Popen([sys.executable, stubs, "ml", "--port", str(args.ml_port),
+                          "--latency-ms", str(args.ml_latency_ms), "--sigma", str(args.ml_sigma),
+                          "--error-rate", str(args.ml_error_rate), "--error-status", str(args.ml_error_status)]),
+        subprocess.Popen([sys.executable, stubs, "llm", "--port", str(args.llm_port),
+                          "--latency-ms", str(args.llm_latency_ms), "--sigma", str(args.llm_sigma),
+                          "--error-rate", str(args.llm_error_rate), "--error-status", str(args.llm_error_status),
+                          "--bad-json-rate", str(args.llm_bad_json_rate)]),
+    ]
+    wait_until_up(f"http://127.0.0.1:{args.ml_port}/docs")
+    wait_until_up(f"http://127.0.0.1:{args.llm_port}/docs")
+
+    env = dict(
+        os.environ,
+        ML_API_URL=f"http://127.0.0.1:{args.ml_port}",
+        GOOGLE_BASE_URL=f"http://127.0.0.1:{args.llm_port}/v1",
+        GOOGLE_API_KEY="loadtest",
+        MODEL_NAME="stub",
+        CHECKPOINT_DB=os.path.join(tempfile.mkdtemp(prefix="arogyamitra-loadtest-"), "checkpoints.sqlite"),
+    )
+    procs.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+         "--port", str(args.server_port), "--log-level", "warning"],
+        cwd=GRAPH_DIR, env=env,
+    ))
+    base_url = f"http://127.0.0.1:{args.server_port}"
+    wait_until_up(base_url + "/")
+    return base_url, procs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrency against the ArogyaMitra graph server")
+    parser.add_argument("--url",        default="http://127.0.0.1:8001", help="Graph server URL (ignored with --spawn)")
+    parser.add_argument("--levels",     default="1,2,4,8,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration",   type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--timeout",    type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--endpoints",  default=",".join(ENDPOINTS))
+    parser.add_argument("--min-gain",   type=float, default=0.05, help="Throughput gain below which the server counts as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--output",     default=None, help="Write the full results as JSON to this file")
+
+    parser.add_argument("--spawn",      action="store_true", help="Start stubs and the graph server locally")
+    parser.add_argument("--server-port", type=int, default=8101)
+    parser.add_argument("--ml-port",     type=int, default=9101)
+    parser.add_argument("--llm-port",    type=int, default=9102)
+    parser.add_argument("--ml-latency-ms",  type=float, default=300)
+    parser.add_argument("--llm-latency-ms", type=float, default=1200)
+    parser.add_argument("--ml-sigma",       type=float, default=0.3, help="Lognormal spread of ML stub latency")
+    parser.add_argument("--llm-sigma",      type=float, default=0.3, help="Lognormal spread of LLM stub latency")
+    parser.add_argument("--ml-error-rate",  type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--ml-error-status",  type=int, default=503)
+    parser.add_argument("--llm-error-status", type=int, default=503)
+    parser.add_argument("--llm-bad-json-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+
+    procs = []
+    base_url = args.url
+    if args.spawn:
+        base_url, procs = spawn_stack(args)
+
+    try:
+        results = []
+        for level in levels:
+            print(f"Running {level} concurrent workers for {args.duration}s...")
+            samples, wall = run_level(base_url, endpoints, level, args.duration, args.timeout)
+            results.append(summarize(samples, wall))
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+
+    saturation = find_saturation(levels, results, args.min_gain, args.max_error_rate)
+    print()
+    print_report(levels, results, saturation)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "levels":     [{"concurrency": lvl, "endpoints": res} for lvl, res in zip(levels, results)],
+                "saturation": saturation,
+            }, f, indent=2)
+        print(f"Results saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
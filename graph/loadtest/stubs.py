@@ -0,0 +1,155 @@
+"""
+Local stand-ins for the remote services the graph calls, for offline load tests.
+
+  llm  OpenAI-compatible /v1/chat/completions returning valid LLMConclusion JSON
+  ml   ML API /predict returning an xai_output payload shaped like ML_Model/app.py
+
+Usage (from the graph/ directory):
+    python loadtest/stubs.py llm --port 9102 --latency-ms 1200 --sigma 0.4 --error-rate 0.02
+    python loadtest/stubs.py ml  --port 9101 --latency-ms 300  --sigma 0.3 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class Profile:
+    """Latency and error distribution of a stub. Latency is lognormal around latency_ms."""
+
+    def __init__(self, latency_ms: float, sigma: float, error_rate: float, error_status: int, bad_json_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.bad_json_rate = bad_json_rate
+
+    async def delay(self):
+        if self.latency_ms > 0:
+            await asyncio.sleep(random.lognormvariate(0, self.sigma) * self.latency_ms / 1000)
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+
+def make_llm_app(profile: Profile) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await profile.delay()
+        if profile.should_fail():
+            return JSONResponse({"error": {"message": "stub failure", "type": "server_error"}}, status_code=profile.error_status)
+
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        escalate = random.random() < 0.3
+        conclusion = {
+            "diagnosis_summary": "Symptoms are consistent with the predicted condition.",
+            "confidence_interpretation": "Moderate confidence; differential diagnoses should be considered.",
+            "severity_assessment": "Moderate. Monitor and reassess within 48 hours.",
+            "key_contributing_factors": "Reported symptoms with the highest LIME impact.",
+            "recommended_next_steps": "Basic blood work and follow-up visit.",
+            "referral_recommendation": "General physician" if not escalate else "Specialist review",
+            "escalate_to_doctor": escalate,
+            "recommended_precautions": "Rest, hydration, and return if symptoms worsen.",
+        }
+        content = json.dumps(conclusion)
+        if random.random() < profile.bad_json_rate:
+            content = "Sorry, I cannot help with that."
+
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    return app
+
+
+DISEASES = ["Malaria", "Dengue", "Typhoid", "Common Cold", "Jaundice", "Pneumonia", "Gastroenteritis"]
+
+
+def make_ml_app(profile: Profile) -> FastAPI:
+    app = FastAPI(title="ML stub")
+
+    @app.post("/predict")
+    async def predict(request: Request):
+        req = await request.json()
+        await profile.delay()
+        if profile.should_fail():
+            return JSONResponse({"detail": "stub failure"}, status_code=profile.error_status)
+
+        symptoms = req.get("symptoms", [])
+        diseases = random.sample(DISEASES, 3)
+        confidences = sorted((round(random.uniform(5, 95), 2) for _ in range(3)), reverse=True)
+        severities = [
+            {"symptom": s.replace("_", " ").title(), "severity": random.randint(1, 7)}
+            for s in symptoms
+        ]
+        avg_severity = round(sum(s["severity"] for s in severities) / len(severities), 2) if severities else 0
+
+        return {
+            "patientName":       req.get("patientName") or "Patient",
+            "patientAge":        req.get("patientAge"),
+            "patientGender":     req.get("patientGender"),
+            "workerName":        req.get("workerName") or "Healthcare Worker",
+            "location":          req.get("location") or "",
+            "primaryDiagnosis":  diseases[0],
+            "confidenceScore":   confidences[0],
+            "severityScore":     avg_severity,
+            "topPredictions":    [{"disease": d, "confidence": c} for d, c in zip(diseases, confidences)],
+            "matchedSymptoms":   [s["symptom"] for s in severities],
+            "unmatchedSymptoms": [],
+            "symptomSeverities": severities,
+            "description":       f"{diseases[0]} (stub description).",
+            "precautions":       ["rest", "drink fluids", "consult a doctor"],
+            "limeExplanation":   [
+                {"feature": s["symptom"], "impact": round(random.uniform(-0.2, 0.4), 4),
+                 "direction": "Supports Diagnosis"}
+                for s in severities
+            ],
+            "modelVersion":      "stub",
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an LLM or ML stub server for load tests")
+    parser.add_argument("kind", choices=["llm", "ml"])
+    parser.add_argument("--host",          default="127.0.0.1")
+    parser.add_argument("--port",          type=int, required=True)
+    parser.add_argument("--latency-ms",    type=float, default=0, help="Median response latency")
+    parser.add_argument("--sigma",         type=float, default=0.3, help="Lognormal spread of latency")
+    parser.add_argument("--error-rate",    type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status",  type=int, default=503, help="HTTP status for failures")
+    parser.add_argument("--bad-json-rate", type=float, default=0.0, help="LLM only: fraction of non-JSON replies")
+    args = parser.parse_args()
+
+    profile = Profile(args.latency_ms, args.sigma, args.error_rate, args.error_status, args.bad_json_rate)
+    app = make_llm_app(profile) if args.kind == "llm" else make_ml_app(profile)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 import argparse
 import sys
 import os
+import uuid
 from graph import graph
 from graph.graph import PredictRequest
+from utils.checkpointer import run_config, register_run
 
 # Add parent directory to path so we can import ML_Model
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -33,7 +35,9 @@ def main():
     print(f"Running analysis for {args.name} with symptoms: {symptoms}")
 
     initial_state = {"request": predict_request}
-    result = graph.invoke(initial_state)
+    run_id = uuid.uuid4().hex
+    register_run(run_id)
+    result = graph.invoke(initial_state, run_config(run_id))
 
     pdf_bytes = result["pdf_bytes"]
     filename  = args.output or result["filename"]
@@ -2,12 +2,16 @@ import sys
 import os
 import io
 import base64
+import uuid
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
 from graph import graph, PredictRequest
+from utils.checkpointer import run_config, register_run, run_lock, maybe_gc_checkpoints
+from utils.admission import admission, QueueFull
+from utils.tracing import tracer
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -25,6 +29,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Run-Id", "X-Report-Filename"],
 )
 
 
@@ -37,20 +42,36 @@ class AnalyzeRequest(BaseModel):
     location: Optional[str] = ""
 
 
-@app.get("/")
-def root():
-    return {"message": "ArogyaMitra Graph API", "status": "running"}
+def invoke_graph(run_id: str, graph_input):
+    """
+    Invokes the graph for one run under admission control.
+    Fails fast with 429 + Retry-After when the admission queue is full.
+    """
+    try:
+        with admission.admit():
+            with tracer.run(run_id, resumed=graph_input is None):
+                return graph.invoke(graph_input, run_config(run_id))
+    except QueueFull as e:
+        tracer.count_run("rejected")
+        raise HTTPException(
+            status_code=429,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Pipeline failed: {str(e)}",
+            headers={"X-Run-Id": run_id},
+        )
 
 
-@app.post("/analyze")
-def analyze(req: AnalyzeRequest):
+def run_pipeline(req: AnalyzeRequest):
     """
-    Runs the full LangGraph pipeline (ML → LLM → PDF).
-    Returns the generated PDF as a downloadable binary response.
+    Runs the graph under a new checkpointed run ID and returns (run_id, final_state).
+    Failed runs are continued only through the resume endpoints.
     """
-    if not req.symptoms:
-        raise HTTPException(status_code=400, detail="At least one symptom is required")
-
+    run_id = uuid.uuid4().hex
     predict_request = PredictRequest(
         symptoms=req.symptoms,
         patientName=req.patientName,
@@ -60,11 +81,32 @@ def analyze(req: AnalyzeRequest):
         location=req.location,
     )
 
-    try:
-        result = graph.invoke({"request": predict_request})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
+    maybe_gc_checkpoints()
+    with run_lock(run_id):
+        register_run(run_id)
+        return run_id, invoke_graph(run_id, {"request": predict_request})
+
+
+def resume_pipeline(run_id: str):
+    """
+    Continues a run from its last successful node and returns (run_id, final_state).
+    Completed runs are returned from the checkpoint without re-running anything.
+    A concurrent resume of the same run waits for this one, then reads its checkpoint.
+    """
+    config = run_config(run_id)
+    with run_lock(run_id):
+        snapshot = graph.get_state(config)
+        if not snapshot.values:
+            raise HTTPException(status_code=404, detail=f"Unknown or expired run: {run_id}")
+
+        if not snapshot.next:
+            tracer.count_run("cached")
+            return run_id, snapshot.values
+
+        return run_id, invoke_graph(run_id, None)
 
+
+def pdf_response(run_id: str, result: dict):
     pdf_bytes = result["pdf_bytes"]
     filename  = result["filename"]
 
@@ -74,40 +116,19 @@ def analyze(req: AnalyzeRequest):
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
             "X-Report-Filename": filename,
+            "X-Run-Id": run_id,
         },
     )
 
 
-@app.post("/analyze/json")
-def analyze_json(req: AnalyzeRequest):
-    """
-    Runs the full LangGraph pipeline (ML → LLM → PDF).
-    Returns JSON with ML results, LLM summary, and base64-encoded PDF.
-    The frontend can use the JSON to display results AND get the PDF.
-    """
-    if not req.symptoms:
-        raise HTTPException(status_code=400, detail="At least one symptom is required")
-
-    predict_request = PredictRequest(
-        symptoms=req.symptoms,
-        patientName=req.patientName,
-        patientAge=req.patientAge,
-        patientGender=req.patientGender,
-        workerName=req.workerName,
-        location=req.location,
-    )
-
-    try:
-        result = graph.invoke({"request": predict_request})
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
-
+def json_response(run_id: str, result: dict):
     xai_output  = result.get("xai_output", {})
     llm_summary = result.get("llm_summary")
     pdf_bytes   = result["pdf_bytes"]
     filename    = result["filename"]
 
     return JSONResponse({
+        "runId": run_id,
         "mlResult": {
             "disease":          xai_output.get("primaryDiagnosis"),
             "confidence":       xai_output.get("confidenceScore", 0) / 100,
@@ -117,6 +138,7 @@ def analyze_json(req: AnalyzeRequest):
             "precautions":      xai_output.get("precautions", []),
             "description":      xai_output.get("description", ""),
             "limeExplanation":  xai_output.get("limeExplanation", []),
+            "modelVersion":     xai_output.get("modelVersion"),
         },
         "llmResult": llm_summary.model_dump() if llm_summary else {},
         "pdfBase64": base64.b64encode(pdf_bytes).decode("utf-8"),
@@ -124,6 +146,71 @@ def analyze_json(req: AnalyzeRequest):
     })
 
 
+@app.get("/")
+def root():
+    return {"message": "ArogyaMitra Graph API", "status": "running"}
+
+
+@app.get("/admission/stats")
+def admission_stats():
+    """Per-stage limits, queue depth, and queue wait / service time per priority class."""
+    return admission.stats()
+
+
+@app.get("/metrics")
+def metrics():
+    """Per-node latency percentiles, payload sizes, LLM token usage and run outcomes, plus admission stats."""
+    return {"tracing": tracer.metrics(), "admission": admission.stats()}
+
+
+@app.post("/analyze")
+def analyze(req: AnalyzeRequest):
+    """
+    Runs the full LangGraph pipeline (ML → LLM → PDF).
+    Returns the generated PDF as a downloadable binary response.
+    The run ID is returned in the X-Run-Id header (also on failure).
+    """
+    if not req.symptoms:
+        raise HTTPException(status_code=400, detail="At least one symptom is required")
+
+    run_id, result = run_pipeline(req)
+    return pdf_response(run_id, result)
+
+
+@app.post("/analyze/json")
+def analyze_json(req: AnalyzeRequest):
+    """
+    Runs the full LangGraph pipeline (ML → LLM → PDF).
+    Returns JSON with ML results, LLM summary, and base64-encoded PDF.
+    The frontend can use the JSON to display results AND get the PDF.
+    """
+    if not req.symptoms:
+        raise HTTPException(status_code=400, detail="At least one symptom is required")
+
+    run_id, result = run_pipeline(req)
+    return json_response(run_id, result)
+
+
+@app.post("/analyze/resume/{run_id}")
+def analyze_resume(run_id: str):
+    """
+    Resumes a failed run from its last successful node.
+    Returns the generated PDF, like /analyze.
+    """
+    run_id, result = resume_pipeline(run_id)
+    return pdf_response(run_id, result)
+
+
+@app.post("/analyze/json/resume/{run_id}")
+def analyze_json_resume(run_id: str):
+    """
+    Resumes a failed run from its last successful node.
+    Returns JSON, like /analyze/json.
+    """
+    run_id, result = resume_pipeline(run_id)
+    return json_response(run_id, result)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001, reload=False)
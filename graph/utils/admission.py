@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from utils.tracing import record_queue_wait
+
+# Per-stage concurrency limits. Stages map to graph nodes: ml -> xai_node,
+# llm -> llm_node, pdf -> report_node.
+STAGE_LIMITS = {
+    "ml":  int(os.getenv("ML_CONCURRENCY", 4)),
+    "llm": int(os.getenv("LLM_CONCURRENCY", 8)),
+    "pdf": int(os.getenv("PDF_CONCURRENCY", 2)),
+}
+
+# Maximum runs admitted at once (running or waiting for a stage). Keep this
+# below the server's worker thread pool so waiting runs never starve it.
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 24))
+
+# A case is promoted once xai_output reports either of these
+HIGH_SEVERITY_THRESHOLD = float(os.getenv("HIGH_SEVERITY_THRESHOLD", 4.5))
+LOW_CONFIDENCE_THRESHOLD = float(os.getenv("LOW_CONFIDENCE_THRESHOLD", 40))
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal"}
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Admission queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def priority_for(state) -> int:
+    """Severe, uncertain or escalated cases jump ahead of routine ones."""
+    xai = state.get("xai_output") or {}
+    if (xai.get("severityScore") or 0) >= HIGH_SEVERITY_THRESHOLD:
+        return PRIORITY_HIGH
+    if xai and xai.get("confidenceScore", 100) < LOW_CONFIDENCE_THRESHOLD:
+        return PRIORITY_HIGH
+
+    llm_summary = state.get("llm_summary")
+    if llm_summary is not None and llm_summary.escalate_to_doctor:
+        return PRIORITY_HIGH
+
+    return PRIORITY_NORMAL
+
+
+class StageGate:
+    """Concurrency limit for one stage. Waiters are served by priority, then arrival order."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = []
+        self._seq = itertools.count()
+
+    def acquire(self, priority: int):
+        with self._cond:
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            while self._active >= self.limit or self._waiting[0] != entry:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._active += 1
+            # Another slot may still be free for the next waiter in line
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.service_total = 0.0
+        self.service_max = 0.0
+
+    def add(self, wait: float, service: float):
+        self.count += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.service_total += service
+        self.service_max = max(self.service_max, service)
+
+    def as_dict(self):
+        n = self.count or 1
+        return {
+            "count":          self.count,
+            "avgWaitMs":      round(self.wait_total / n * 1000, 2),
+            "maxWaitMs":      round(self.wait_max * 1000, 2),
+            "avgServiceMs":   round(self.service_total / n * 1000, 2),
+            "maxServiceMs":   round(self.service_max * 1000, 2),
+        }
+
+
+class AdmissionController:
+    def __init__(self, stage_limits=STAGE_LIMITS, max_in_flight=MAX_IN_FLIGHT):
+        self.gates = {name: StageGate(limit) for name, limit in stage_limits.items()}
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._run_seconds_total = 0.0
+        self._runs_completed = 0
+        self._timings = {}
+
+    def retry_after(self) -> int:
+        """Rough time until a slot frees up, from the average run time so far."""
+        avg_run = self._run_seconds_total / self._runs_completed if self._runs_completed else 1.0
+        bottleneck = min(gate.limit for gate in self.gates.values())
+        return max(1, min(60, math.ceil(avg_run * self._in_flight / bottleneck)))
+
+    @contextmanager
+    def admit(self):
+        """Admits one pipeline run or raises QueueFull immediately."""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                self._rejected += 1
+                raise QueueFull(self.retry_after())
+            self._in_flight += 1
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._run_seconds_total += time.monotonic() - start
+                self._runs_completed += 1
+
+    @contextmanager
+    def stage(self, name: str, state):
+        """Holds a slot of the given stage for the duration of the block."""
+        gate = self.gates[name]
+        priority = priority_for(state)
+
+        queued_at = time.monotonic()
+        gate.acquire(priority)
+        started_at = time.monotonic()
+        record_queue_wait((started_at - queued_at) * 1000)
+        try:
+            yield
+        finally:
+            gate.release()
+            finished_at = time.monotonic()
+            with self._lock:
+                key = (name, priority)
+                if key not in self._timings:
+                    self._timings[key] = _Timing()
+                self._timings[key].add(started_at - queued_at, finished_at - started_at)
+
+    def gated(self, name: str, node):
+        """Wraps a graph node so it runs under the given stage's limit."""
+        def run(state):
+            with self.stage(name, state):
+                return node(state)
+        return run
+
+    def stats(self):
+        with self._lock:
+            stages = {}
+            for name, gate in self.gates.items():
+                stages[name] = {
+                    "limit":  gate.limit,
+                    "active": gate.active,
+                    "queued": gate.queued,
+                    "byPriority": {
+                        PRIORITY_NAMES[p]: self._timings[(name, p)].as_dict()
+                        for p in PRIORITY_NAMES
+                        if (name, p) in self._timings
+                    },
+                }
+            return {
+                "inFlight":    self._in_flight,
+                "maxInFlight": self.max_in_flight,
+                "rejected":    self._rejected,
+                "stages":      stages,
+            }
+
+
+admission = AdmissionController()
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Local SQLite store for per-node checkpoints. A failed run keeps the state of
+# every node that finished, so a resume only re-runs what is left.
+CHECKPOINT_DB = os.getenv(
+    "CHECKPOINT_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "checkpoints.sqlite"),
+)
+CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", 24 * 60 * 60))
+CHECKPOINT_GC_INTERVAL_SECONDS = int(os.getenv("CHECKPOINT_GC_INTERVAL_SECONDS", 10 * 60))
+
+# State types stored in checkpoints (see HealthcareState in graph.py)
+_STATE_TYPES = [("graph", "PredictRequest"), ("llm", "LLMConclusion")]
+
+_conn = sqlite3.connect(CHECKPOINT_DB, check_same_thread=False)
+checkpointer = SqliteSaver(_conn, serde=JsonPlusSerializer(allowed_msgpack_modules=_STATE_TYPES))
+checkpointer.setup()
+
+with checkpointer.cursor() as cur:
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS runs ("
+        "thread_id TEXT PRIMARY KEY, "
+        "created_at REAL NOT NULL)"
+    )
+
+_gc_lock = threading.Lock()
+_last_gc = 0.0
+
+# run_id -> [lock, holders and waiters]; entries are dropped when unused
+_run_locks = {}
+_run_locks_lock = threading.Lock()
+
+
+def run_config(run_id: str) -> dict:
+    """Config that pins a graph invocation to the checkpoints of one run."""
+    return {"configurable": {"thread_id": run_id}}
+
+
+def register_run(run_id: str):
+    """Records when a run started so its checkpoints can be expired later."""
+    with checkpointer.cursor() as cur:
+        cur.execute(
+            "INSERT OR IGNORE INTO runs (thread_id, created_at) VALUES (?, ?)",
+            (run_id, time.time()),
+        )
+
+
+@contextmanager
+def run_lock(run_id: str):
+    """
+    Serializes work on one run within this process. Hold it from reading the
+    run's state until its invocation returns, so two requests can never both
+    see the same unfinished node and run it twice.
+    """
+    with _run_locks_lock:
+        entry = _run_locks.setdefault(run_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _run_locks_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _run_locks[run_id]
+
+
+def gc_checkpoints(max_age_seconds: int = CHECKPOINT_TTL_SECONDS) -> int:
+    """Deletes checkpoints of runs older than max_age_seconds. Returns the number of runs removed."""
+    cutoff = time.time() - max_age_seconds
+    with checkpointer.cursor(transaction=False) as cur:
+        cur.execute("SELECT thread_id FROM runs WHERE created_at < ?", (cutoff,))
+        expired = [row[0] for row in cur.fetchall()]
+
+    for run_id in expired:
+        checkpointer.delete_thread(run_id)
+        with checkpointer.cursor() as cur:
+            cur.execute("DELETE FROM runs WHERE thread_id = ?", (run_id,))
+
+    return len(expired)
+
+
+def maybe_gc_checkpoints():
+    """Runs gc_checkpoints at most once per CHECKPOINT_GC_INTERVAL_SECONDS."""
+    global _last_gc
+    with _gc_lock:
+        now = time.time()
+        if now - _last_gc < CHECKPOINT_GC_INTERVAL_SECONDS:
+            return
+        _last_gc = now
+    gc_checkpoints()
@@ -0,0 +1,231 @@
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+
+# Per-run spans for each graph node, exported as OTLP-shaped JSON lines
+# (one span per line). Aggregated per-node stats are kept for every run;
+# TRACE_SAMPLE_RATE only controls which runs are written to the sink.
+TRACE_FILE = os.getenv(
+    "TRACE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "traces.jsonl"),
+)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.1))
+
+# Latency samples kept per node for percentiles
+LATENCY_WINDOW = 1000
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _payload_size(value) -> int:
+    """Approximate serialized size of a node's input/output in bytes."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_payload_size(v) for v in value.values())
+    if hasattr(value, "model_dump_json"):
+        return len(value.model_dump_json())
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    def __init__(self, trace_id: str, name: str, parent_id=None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self.attributes = {}
+        self.sampled = True
+        self.children = []
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId":           self.trace_id,
+            "spanId":            self.span_id,
+            "name":              self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano":   str(self.end_ns),
+            "status":            {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error
+                                 else {"code": "STATUS_CODE_OK"},
+            "attributes":        [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NodeStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)   # service time, excluding admission queue wait
+        self.queue_wait_ms = 0.0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.outcomes = Counter()
+
+    def as_dict(self):
+        latencies = sorted(self.latencies)
+
+        def pct(q):
+            return round(latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))], 2) if latencies else 0.0
+
+        n = self.count or 1
+        return {
+            "count":              self.count,
+            "errors":             self.errors,
+            "p50Ms":              pct(50),
+            "p95Ms":              pct(95),
+            "p99Ms":              pct(99),
+            "avgQueueWaitMs":     round(self.queue_wait_ms / n, 2),
+            "avgInputBytes":      round(self.input_bytes / n),
+            "avgOutputBytes":     round(self.output_bytes / n),
+            "promptTokens":       self.prompt_tokens,
+            "completionTokens":   self.completion_tokens,
+            "outcomes":           dict(self.outcomes),
+        }
+
+
+class Tracer:
+    def __init__(self, sink_path: str = TRACE_FILE, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.sink_path = sink_path
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._nodes = {}
+        self._runs = Counter()
+
+    @contextmanager
+    def run(self, run_id: str, resumed: bool = False):
+        """Root span for one graph invocation. Node spans inside it become its children."""
+        span = Span(run_id, "graph.run")
+        span.attributes.update({"run.id": run_id, "run.resumed": resumed})
+        span.sampled = random.random() < self.sample_rate
+
+        run_token = _current_run.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            _current_run.reset(run_token)
+            span.end_ns = time.time_ns()
+            self.count_run("error" if span.error else "resumed" if resumed else "ok")
+            if span.sampled:
+                self._export([span] + span.children)
+
+    def count_run(self, outcome: str):
+        """Counts a run outcome: ok, error, resumed, cached (served from checkpoint) or rejected."""
+        with self._lock:
+            self._runs[outcome] += 1
+
+    def traced(self, name: str, node):
+        """Wraps a graph node so each call records a span and updates the node's stats."""
+        def run(state):
+            root = _current_run.get()
+            span = Span(root.trace_id if root else uuid.uuid4().hex, name, root.span_id if root else None)
+            span.attributes["payload.input_bytes"] = _payload_size(dict(state))
+
+            span_token = _current_span.set(span)
+            try:
+                result = node(state)
+                span.attributes["payload.output_bytes"] = _payload_size(result)
+                span.attributes.setdefault("outcome", "ok")
+                return result
+            except Exception as e:
+                span.error = str(e)
+                span.attributes.setdefault("outcome", "error")
+                raise
+            finally:
+                _current_span.reset(span_token)
+                span.end_ns = time.time_ns()
+                self._record(span)
+                if root is not None:
+                    root.children.append(span)
+        return run
+
+    def _record(self, span: Span):
+        attrs = span.attributes
+        with self._lock:
+            if span.name not in self._nodes:
+                self._nodes[span.name] = _NodeStats()
+            stats = self._nodes[span.name]
+            stats.count += 1
+            stats.errors += 1 if span.error else 0
+            queue_wait = attrs.get("queue.wait_ms", 0.0)
+            stats.latencies.append(span.duration_ms - queue_wait)
+            stats.queue_wait_ms += queue_wait
+            stats.input_bytes += attrs.get("payload.input_bytes", 0)
+            stats.output_bytes += attrs.get("payload.output_bytes", 0)
+            stats.prompt_tokens += attrs.get("llm.usage.prompt_tokens", 0)
+            stats.completion_tokens += attrs.get("llm.usage.completion_tokens", 0)
+            stats.outcomes[attrs.get("outcome", "ok")] += 1
+
+    def _export(self, spans):
+        lines = "".join(json.dumps(s.to_otlp(), default=str) + "\n" for s in spans)
+        with self._lock:
+            with open(self.sink_path, "a") as f:
+                f.write(lines)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "runs":       dict(self._runs),
+                "sampleRate": self.sample_rate,
+                "nodes":      {name: stats.as_dict() for name, stats in self._nodes.items()},
+            }
+
+
+def record_llm_usage(usage):
+    """Attaches token usage from an OpenAI-style response.usage to the current span."""
+    span = _current_span.get()
+    if span is None or usage is None:
+        return
+    span.attributes["llm.usage.prompt_tokens"] = getattr(usage, "prompt_tokens", 0) or 0
+    span.attributes["llm.usage.completion_tokens"] = getattr(usage, "completion_tokens", 0) or 0
+
+
+def record_queue_wait(wait_ms: float):
+    """Records time the current node spent waiting for its admission stage slot."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes["queue.wait_ms"] = round(wait_ms, 3)
+
+
+def record_outcome(outcome: str):
+    """Marks how the current node finished, e.g. 'parse_error' or 'cached'."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes["outcome"] = outcome
+
+
+tracer = Tracer()